@@ -7,32 +7,127 @@ Streamlit app for tracking weight, dosage, and side effects
 import streamlit as st
 import pandas as pd
 import os
+import json
 from datetime import datetime, date
 import plotly.express as px
 import plotly.graph_objects as go
+from plotly_resampler import FigureResampler
 
 # Config
 st.set_page_config(page_title="GLP-1 Journey", page_icon="💪", layout="wide")
 
-DATA_FILE = "glp1_data.csv"
+DATA_FILE = "glp1_data.parquet"
+LOG_FILE = "glp1_data.log.jsonl"
+LEGACY_FILE = "glp1_data.csv"
+COLUMNS = ['date', 'weight', 'dose', 'nausea', 'fatigue', 'gi', 'sleep', 'notes']
+COMPACT_AFTER = 100  # logged changes before they are folded into DATA_FILE
+RECENT_ROWS = 50  # entries shown in the data table by default
+
+# Standard titration schedule reference
+SCHEDULE = pd.DataFrame({
+    'Week': [1, 2, 3, 4, 5, 6, 7, 8],
+    'Dose (mg)': [2, 4, 6, 8, 10, 12, 12, 12]
+})
+
+def log_change(op, **fields):
+    """Record an add/edit/delete without rewriting the stored data"""
+    with open(LOG_FILE, 'a') as f:
+        f.write(json.dumps({'op': op, **fields}, default=str) + '\n')
+    load_data.clear()
+
+def apply_change(df, change):
+    """Replay one logged change, in the order it was made"""
+    if change['op'] == 'add':
+        row = dict(change['row'], date=date.fromisoformat(change['row']['date']))
+        # df stays sorted by date, so only a back-dated entry has to move
+        pos = df['date'].searchsorted(row['date'], side='right')
+        last = len(df)
+        df.loc[last] = [row[col] for col in COLUMNS]
+        if pos < last:
+            df = df.take([*range(pos), last, *range(pos, last)]).reset_index(drop=True)
+    elif change['op'] == 'edit':
+        df.loc[change['idx'], list(change['values'])] = list(change['values'].values())
+    elif change['op'] == 'delete':
+        df = df.drop(change['idx']).reset_index(drop=True)
+    return df
 
 # Load or initialize data
 @st.cache_data
 def load_data():
     if os.path.exists(DATA_FILE):
-        df = pd.read_csv(DATA_FILE)
-        df['date'] = pd.to_datetime(df['date']).dt.date
-        return df
-    return pd.DataFrame(columns=[
-        'date', 'weight', 'dose', 'nausea', 'fatigue', 'gi', 'sleep', 'notes'
-    ])
+        df = pd.read_parquet(DATA_FILE)
+    else:
+        df = pd.DataFrame(columns=COLUMNS)
+    if os.path.exists(LEGACY_FILE):
+        # Entries from versions that stored data (or new entries) as CSV
+        legacy = pd.read_csv(LEGACY_FILE)
+        legacy['date'] = pd.to_datetime(legacy['date']).dt.date
+        if not df.empty:
+            legacy = pd.concat([df, legacy], ignore_index=True)
+        df = legacy.sort_values('date', kind='stable').reset_index(drop=True)
+    changes = []
+    if os.path.exists(LOG_FILE):
+        with open(LOG_FILE) as f:
+            changes = [json.loads(line) for line in f]
+    for change in changes:
+        df = apply_change(df, change)
+    df = df.infer_objects()
+    df['notes'] = df['notes'].fillna("").astype('string[pyarrow]')
+    if len(changes) > COMPACT_AFTER or os.path.exists(LEGACY_FILE):
+        save_data(df)
+    return df
 
 def save_data(df):
-    df.to_csv(DATA_FILE, index=False)
-    st.cache_data.clear()
+    """Rewrite DATA_FILE and drop the changes it now contains"""
+    df.to_parquet(DATA_FILE, index=False)
+    for f in (LOG_FILE, LEGACY_FILE):
+        if os.path.exists(f):
+            os.remove(f)
+
+def data_version(df):
+    """Cheap cache key that changes whenever the stored data does"""
+    mtimes = tuple(os.stat(f).st_mtime_ns if os.path.exists(f) else None
+                   for f in (DATA_FILE, LOG_FILE))
+    return len(df), mtimes
+
+@st.cache_data
+def side_effect_means(_df, version):
+    return _df[['nausea', 'fatigue', 'gi', 'sleep']].mean().to_dict()
+
+@st.cache_resource(max_entries=1)
+def build_weight_fig(_df, version):
+    fig = FigureResampler(px.scatter(_df, x='date', y='weight', render_mode='webgl',
+                                     title="Weight Loss Journey",
+                                     labels={'date': 'Date', 'weight': 'Weight (lbs)'}))
+    fig.add_hline(y=_df['weight'].iat[0], line_dash="dash", line_color="red", 
+                 annotation_text="Start")
+    return fig
+
+@st.cache_resource(max_entries=1)
+def build_dose_fig(_df, version):
+    return px.bar(_df, x='date', y='dose', 
+                 title="Dose Over Time",
+                 labels={'date': 'Date', 'dose': 'Dose (mg)'},
+                 color='dose',
+                 color_continuous_scale='Greens')
+
+@st.cache_resource(max_entries=1)
+def build_side_effects_fig(_df, version):
+    # Side effects over time (downsampled to screen resolution)
+    fig = FigureResampler(go.Figure())
+    fig.add_trace(go.Scattergl(x=_df['date'], y=_df['nausea'], name="Nausea 🤢", line=dict(color='red')))
+    fig.add_trace(go.Scattergl(x=_df['date'], y=_df['fatigue'], name="Fatigue 😴", line=dict(color='orange')))
+    fig.add_trace(go.Scattergl(x=_df['date'], y=_df['gi'], name="GI Issues 💩", line=dict(color='brown')))
+    fig.add_trace(go.Scattergl(x=_df['date'], y=_df['sleep'], name="Sleep 😵", line=dict(color='purple')))
+    
+    fig.update_layout(title="Side Effects Over Time", 
+                     yaxis_title="Severity (0-10)",
+                     xaxis_title="Date")
+    return fig
 
 # Initialize
 df = load_data()
+version = data_version(df)
 
 # Sidebar - Add new entry
 st.sidebar.header("💉 Log Today's Data")
@@ -54,7 +149,7 @@ with st.sidebar.form("entry_form"):
     submitted = st.form_submit_button("Save Entry")
     
     if submitted:
-        new_row = pd.DataFrame([{
+        log_change('add', row={
             'date': entry_date,
             'weight': entry_weight,
             'dose': entry_dose,
@@ -63,9 +158,7 @@ with st.sidebar.form("entry_form"):
             'gi': entry_gi,
             'sleep': entry_sleep,
             'notes': entry_notes
-        }])
-        df = pd.concat([df, new_row], ignore_index=True).sort_values('date')
-        save_data(df)
+        })
         st.success("Saved! 🎉")
         st.rerun()
 
@@ -74,109 +167,91 @@ st.title("💪 GLP-1 Journey: Retatrutide")
 
 # Show data stats
 if not df.empty:
-    latest = df.iloc[-1]
-    start = df.iloc[0]
-    weight_loss = start['weight'] - latest['weight'] if start['weight'] and latest['weight'] else 0
+    w_latest = df['weight'].iat[-1]
+    w_start = df['weight'].iat[0]
+    d_latest = df['dose'].iat[-1]
+    date_latest = df['date'].iat[-1]
+    date_start = df['date'].iat[0]
+    weight_loss = w_start - w_latest if w_start and w_latest else 0
     
     col1, col2, col3, col4 = st.columns(4)
-    col1.metric("Current Weight", f"{latest['weight']:.1f} lbs")
+    col1.metric("Current Weight", f"{w_latest:.1f} lbs")
     col2.metric("Total Loss", f"{weight_loss:.1f} lbs" if weight_loss > 0 else f"+{abs(weight_loss):.1f} lbs")
-    col3.metric("Current Dose", f"{latest['dose']:.1f} mg")
-    col4.metric("Days Tracking", (pd.to_datetime(latest['date']) - pd.to_datetime(start['date'])).days)
+    col3.metric("Current Dose", f"{d_latest:.1f} mg")
+    col4.metric("Days Tracking", (date_latest - date_start).days)
     
     st.markdown("---")
 
-# Tabs for different views
-tab1, tab2, tab3, tab4 = st.tabs(["📊 Weight Chart", "💉 Dosage Log", "🤢 Side Effects", "📋 Data Table"])
+# Views - a radio rather than st.tabs so only the selected view is built on each rerun
+view = st.radio("View", ["📊 Weight Chart", "💉 Dosage Log", "🤢 Side Effects", "📋 Data Table"],
+                horizontal=True, label_visibility="collapsed")
 
-with tab1:
+if view == "📊 Weight Chart":
     st.subheader("Weight Over Time")
     if len(df) > 1:
         # Weight chart
-        fig = px.scatter(df, x='date', y='weight', 
-                        title="Weight Loss Journey",
-                        labels={'date': 'Date', 'weight': 'Weight (lbs)'})
-        fig.add_hline(y=start['weight'], line_dash="dash", line_color="red", 
-                     annotation_text="Start")
+        fig = build_weight_fig(df, version)
         st.plotly_chart(fig, use_container_width=True)
         
         # Weekly change
         if len(df) >= 7:
             weekly = df.tail(7)
-            weekly_change = weekly.iloc[0]['weight'] - weekly.iloc[-1]['weight']
+            weekly_change = weekly['weight'].iat[0] - weekly['weight'].iat[-1]
             st.metric("This Week", f"{weekly_change:+.1f} lbs")
     else:
         st.info("Log at least 2 weigh-ins to see the chart! 📈")
 
-with tab2:
+elif view == "💉 Dosage Log":
     st.subheader("Dosage Timeline")
     if not df.empty:
-        fig = px.bar(df, x='date', y='dose', 
-                    title="Dose Over Time",
-                    labels={'date': 'Date', 'dose': 'Dose (mg)'},
-                    color='dose',
-                    color_continuous_scale='Greens')
+        fig = build_dose_fig(df, version)
         st.plotly_chart(fig, use_container_width=True)
         
         # Dosage schedule reference
         st.markdown("### Standard Titration Schedule")
-        schedule = pd.DataFrame({
-            'Week': [1, 2, 3, 4, 5, 6, 7, 8],
-            'Dose (mg)': [2, 4, 6, 8, 10, 12, 12, 12]
-        })
-        st.table(schedule)
+        st.table(SCHEDULE)
     else:
         st.info("Log your doses above! 💉")
 
-with tab3:
+elif view == "🤢 Side Effects":
     st.subheader("Side Effects Tracker")
     if not df.empty:
-        # Side effects over time
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(x=df['date'], y=df['nausea'], name="Nausea 🤢", line=dict(color='red')))
-        fig.add_trace(go.Scatter(x=df['date'], y=df['fatigue'], name="Fatigue 😴", line=dict(color='orange')))
-        fig.add_trace(go.Scatter(x=df['date'], y=df['gi'], name="GI Issues 💩", line=dict(color='brown')))
-        fig.add_trace(go.Scatter(x=df['date'], y=df['sleep'], name="Sleep 😵", line=dict(color='purple')))
-        
-        fig.update_layout(title="Side Effects Over Time", 
-                         yaxis_title="Severity (0-10)",
-                         xaxis_title="Date")
+        fig = build_side_effects_fig(df, version)
         st.plotly_chart(fig, use_container_width=True)
         
         # Average side effects
         st.markdown("### Average Side Effects")
+        means = side_effect_means(df, version)
         avg_cols = st.columns(4)
-        avg_cols[0].metric("Nausea", f"{df['nausea'].mean():.1f}/10")
-        avg_cols[1].metric("Fatigue", f"{df['fatigue'].mean():.1f}/10")
-        avg_cols[2].metric("GI", f"{df['gi'].mean():.1f}/10")
-        avg_cols[3].metric("Sleep", f"{df['sleep'].mean():.1f}/10")
+        avg_cols[0].metric("Nausea", f"{means['nausea']:.1f}/10")
+        avg_cols[1].metric("Fatigue", f"{means['fatigue']:.1f}/10")
+        avg_cols[2].metric("GI", f"{means['gi']:.1f}/10")
+        avg_cols[3].metric("Sleep", f"{means['sleep']:.1f}/10")
     else:
         st.info("Log side effects in the sidebar! 📝")
 
-with tab4:
+elif view == "📋 Data Table":
     st.subheader("All Data")
     if not df.empty:
         # Build list of entries for selectbox
-        df['display'] = df.apply(lambda r: f"{r['date']} | {r['weight']} lbs | {r['dose']}mg", axis=1)
+        options = [f"{d} | {w} lbs | {dose}mg" for d, w, dose in zip(df['date'], df['weight'], df['dose'])]
+        lookup = dict(zip(options, range(len(options))))
         
         col1, col2 = st.columns(2)
         
         with col1:
             st.markdown("### 🗑️ Delete Entry")
-            entry_to_delete = st.selectbox("Select entry to delete", options=[""] + df['display'].tolist(), key="delete_select")
+            entry_to_delete = st.selectbox("Select entry to delete", options=[""] + options, key="delete_select")
             if st.button("Delete", key="delete_btn") and entry_to_delete:
-                idx = df[df['display'] == entry_to_delete].index[0]
-                df = df.drop(idx).reset_index(drop=True)
-                df = df.drop('display', axis=1)
-                save_data(df)
+                log_change('delete', idx=lookup[entry_to_delete])
                 st.success("Deleted!")
                 st.rerun()
         
         with col2:
             st.markdown("✏️ Edit Entry")
-            entry_to_edit = st.selectbox("Select entry to edit", options=[""] + df['display'].tolist(), key="edit_select")
+            entry_to_edit = st.selectbox("Select entry to edit", options=[""] + options, key="edit_select")
             if entry_to_edit:
-                idx = df[df['display'] == entry_to_edit].index[0]
+                idx = lookup[entry_to_edit]
                 row = df.iloc[idx]
                 
                 new_weight = st.number_input("Weight", value=float(row['weight']), key="edit_weight")
@@ -185,29 +260,31 @@ with tab4:
                 new_fatigue = st.slider("Fatigue", 0, 10, int(row['fatigue']), key="edit_fatigue")
                 new_gi = st.slider("GI Issues", 0, 10, int(row['gi']), key="edit_gi")
                 new_sleep = st.slider("Sleep", 0, 10, int(row['sleep']), key="edit_sleep")
-                new_notes = st.text_area("Notes", value=str(row['notes']) if pd.notna(row['notes']) else "", key="edit_notes")
+                new_notes = st.text_area("Notes", value=row['notes'], key="edit_notes")
                 
                 if st.button("Save Changes", key="save_btn"):
-                    df.at[idx, 'weight'] = new_weight
-                    df.at[idx, 'dose'] = new_dose
-                    df.at[idx, 'nausea'] = new_nausea
-                    df.at[idx, 'fatigue'] = new_fatigue
-                    df.at[idx, 'gi'] = new_gi
-                    df.at[idx, 'sleep'] = new_sleep
-                    df.at[idx, 'notes'] = new_notes
-                    df = df.drop('display', axis=1)
-                    save_data(df)
+                    log_change('edit', idx=idx, values={
+                        'weight': new_weight,
+                        'dose': new_dose,
+                        'nausea': new_nausea,
+                        'fatigue': new_fatigue,
+                        'gi': new_gi,
+                        'sleep': new_sleep,
+                        'notes': new_notes
+                    })
                     st.success("Saved!")
                     st.rerun()
         
-        df = df.drop('display', axis=1)
-        
         st.markdown("### 📋 All Entries")
-        st.dataframe(df.sort_values('date', ascending=False), use_container_width=True)
+        # df is sorted by date, so the newest entries are at the end
+        if len(df) > RECENT_ROWS and not st.checkbox(f"Show all {len(df)} entries", key="show_all"):
+            st.dataframe(df.tail(RECENT_ROWS).iloc[::-1], use_container_width=True)
+        else:
+            st.dataframe(df.iloc[::-1], use_container_width=True)
         
         # Download CSV
-        csv = df.to_csv(index=False)
-        st.download_button("Download CSV 📥", csv, "glp1_data.csv", "text/csv")
+        csv_data = df.to_csv(index=False)
+        st.download_button("Download CSV 📥", csv_data, "glp1_data.csv", "text/csv")
     else:
         st.info("No data yet. Start logging! 📋")
 